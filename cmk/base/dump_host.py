@@ -6,6 +6,7 @@
 import socket
 import sys
 import time
+from collections.abc import Iterable
 from contextlib import suppress
 from pathlib import Path
 from typing import Literal
@@ -130,7 +131,17 @@ def dump_host(
     simulation_mode: bool,
 ) -> None:
     # pylint: disable=too-many-branches
-    print_("\n")
+    yellow, normal, bold, white = tty.yellow, tty.normal, tty.bold, tty.white
+    # Collect the output and write it in a few blocks instead of issuing a write per line.
+    # Flush before anything that may warn or fail, so the output keeps its order.
+    output: list[str] = []
+    out = output.append
+
+    def flush() -> None:
+        print_("".join(output))
+        output.clear()
+
+    out("\n")
     hosts_config = config_cache.hosts_config
     if hostname in hosts_config.clusters:
         assert config_cache.nodes(hostname)
@@ -139,7 +150,8 @@ def dump_host(
     else:
         color = tty.bgblue
         add_txt = ""
-    print_("%s%s%s%-78s %s\n" % (color, tty.bold, tty.white, hostname + add_txt, tty.normal))
+    out("%s%s%s%-78s %s\n" % (color, bold, white, hostname + add_txt, normal))
+    flush()
 
     ip_stack_config = ConfigCache.ip_stack_config(hostname)
     ipaddress = (
@@ -175,20 +187,28 @@ def dump_host(
         else:
             addresses += " (Primary: IPv4)"
 
-    print_(
-        tty.yellow
+    out(
+        yellow
         + "Addresses:              "
-        + tty.normal
+        + normal
         + (addresses if addresses is not None else "No IP")
         + "\n"
     )
 
-    tag_template = tty.bold + "[" + tty.normal + "%s" + tty.bold + "]" + tty.normal
-    tags = [(tag_template % ":".join(t)) for t in sorted(config_cache.tags(hostname).items())]
-    print_(tty.yellow + "Tags:                   " + tty.normal + ", ".join(tags) + "\n")
-
-    labels = [tag_template % ":".join(l) for l in sorted(config_cache.labels(hostname).items())]
-    print_(tty.yellow + "Labels:                 " + tty.normal + ", ".join(labels) + "\n")
+    out(
+        yellow
+        + "Tags:                   "
+        + normal
+        + _format_tags(config_cache.tags(hostname).items())
+        + "\n"
+    )
+    out(
+        yellow
+        + "Labels:                 "
+        + normal
+        + _format_tags(config_cache.labels(hostname).items())
+        + "\n"
+    )
 
     if hostname in hosts_config.clusters:
         parents_list = config_cache.nodes(hostname)
@@ -196,24 +216,24 @@ def dump_host(
         parents_list = config_cache.parents(hostname)
 
     if parents_list:
-        print_(
-            tty.yellow + "Parents:                " + tty.normal + ", ".join(parents_list) + "\n"
-        )
-    print_(
-        tty.yellow
+        out(yellow + "Parents:                " + normal + ", ".join(parents_list) + "\n")
+    out(
+        yellow
         + "Host groups:            "
-        + tty.normal
+        + normal
         + ", ".join(config_cache.hostgroups(hostname))
         + "\n"
     )
-    print_(
-        tty.yellow
+    out(
+        yellow
         + "Contact groups:         "
-        + tty.normal
+        + normal
         + ", ".join(config_cache.contactgroups(hostname))
         + "\n"
     )
 
+    flush()
+
     oid_cache_dir = Path(cmk.utils.paths.snmp_scan_cache_dir)
     stored_walk_path = Path(cmk.utils.paths.snmpwalks_dir)
     walk_cache_path = Path(cmk.utils.paths.var_dir) / "snmp_cache"
@@ -274,20 +294,21 @@ def dump_host(
     if config_cache.is_ping_host(hostname):
         agenttypes.append("PING only")
 
-    print_(tty.yellow + "Agent mode:             " + tty.normal)
-    print_(_agent_description(config_cache.computed_datasources(hostname)) + "\n")
+    out(yellow + "Agent mode:             " + normal)
+    out(_agent_description(config_cache.computed_datasources(hostname)) + "\n")
 
-    print_(tty.yellow + "Type of agent:          " + tty.normal)
+    out(yellow + "Type of agent:          " + normal)
     if len(agenttypes) == 1:
-        print_(agenttypes[0] + "\n")
+        out(agenttypes[0] + "\n")
     else:
-        print_("\n  ")
-        print_("\n  ".join(agenttypes) + "\n")
+        out("\n  ")
+        out("\n  ".join(agenttypes) + "\n")
 
-    print_(tty.yellow + "Services:" + tty.normal + "\n")
+    out(yellow + "Services:" + normal + "\n")
+    flush()
 
     headers = ["checktype", "item", "params", "description", "groups"]
-    colors = [tty.normal, tty.blue, tty.normal, tty.green, tty.normal]
+    colors = [normal, tty.blue, normal, tty.green, normal]
 
     table_data = []
     for service in sorted(config_cache.check_table(hostname).values(), key=lambda s: s.description):
@@ -304,6 +325,13 @@ def dump_host(
     tty.print_table(headers, colors, table_data, "  ")
 
 
+def _format_tags(tags: Iterable[tuple[str, str]]) -> str:
+    if not (formatted := [":".join(t) for t in sorted(tags)]):
+        return ""
+    open_, close = tty.bold + "[" + tty.normal, tty.bold + "]" + tty.normal
+    return open_ + (close + ", " + open_).join(formatted) + close
+
+
 def _evaluate_params(params: TimespecificParameters) -> str:
     return (
         repr(params.evaluate(timeperiod_active))
@@ -6,12 +6,13 @@
 from __future__ import annotations
 
 import abc
+import base64
 import os
+import select
 import time
 from collections.abc import Iterable, Iterator
 from contextlib import contextmanager
 from dataclasses import dataclass
-from random import Random
 from typing import final, Final, IO, Literal
 
 import cmk.utils.paths
@@ -31,6 +32,23 @@ ServiceState = int
 ServiceDetails = str
 ServiceAdditionalDetails = str
 
+# Check result records are collected and written in chunks of (at least) this size
+_CHECKRESULT_WRITE_CHUNK_SIZE: Final = 128 * 1024
+
+_CHECKRESULT_RECORD_FORMAT: Final = (
+    b"host_name=%s\n"
+    b"service_description=%s\n"
+    b"check_type=1\n"
+    b"check_options=0\n"
+    b"reschedule_check\n"
+    b"latency=0.0\n"
+    b"start_time=%.1f\n"
+    b"finish_time=%.1f\n"
+    b"return_code=%d\n"
+    b"output=%s\n"
+    b"\n"
+)
+
 
 def _sanitize_perftext(
     result: ServiceCheckResult, perfdata_format: Literal["pnp", "standard"]
@@ -40,8 +58,9 @@ def _sanitize_perftext(
 
     perftexts = [_serialize_metric(*mt) for mt in result.metrics]
 
-    if perfdata_format == "pnp" and (check_command := _extract_check_command(result.output)):
-        perftexts.append("[%s]" % check_command)
+    if perfdata_format == "pnp":
+        if check_command := _extract_check_command(result.output):
+            perftexts.append("[" + check_command + "]")
 
     return " ".join(perftexts)
 
@@ -57,6 +76,8 @@ def _serialize_metric(
     """
     >>> _serialize_metric("hot_chocolate", 2.3, None, 42.0, 0.0, None)
     'hot_chocolate=2.3;;42;0;'
+    >>> _serialize_metric("tea", 1.0, None, None, None, None)
+    'tea=1;;;;'
 
     """
     return (
@@ -203,73 +224,71 @@ class PipeSubmitter(Submitter):
         if not (pipe := PipeSubmitter._open_command_pipe()):
             return
 
+        # Important: Nagios needs the complete command in one single write() block!
+        # Python buffers and sends chunks of 4096 bytes, if we do not flush.
+        # We send as many complete commands per write() as fit into PIPE_BUF, so the
+        # writes stay atomic while we save most of the syscalls.
+        # All results of this batch share the same timestamp and host, so the command
+        # prefix only needs to be formatted once.
+        prefix = b"[%d] PROCESS_SERVICE_CHECK_RESULT;%s;" % (time.time(), self.host_name.encode())
+        buffer = bytearray()
         for submittee in formatted_submittees:
-            msg = "[%d] PROCESS_SERVICE_CHECK_RESULT;%s;%s;%d;%s\n" % (
-                time.time(),
-                self.host_name,
-                submittee.name,
+            msg = b"%s%s;%d;%s\n" % (
+                prefix,
+                submittee.name.encode(),
                 submittee.state,
-                submittee.details.replace("\n", "\\n"),
+                submittee.details.replace("\n", "\\n").encode(),
             )
-            pipe.write(msg.encode())
-            # Important: Nagios needs the complete command in one single write() block!
-            # Python buffers and sends chunks of 4096 bytes, if we do not flush.
-            pipe.flush()
+            if buffer and len(buffer) + len(msg) > select.PIPE_BUF:
+                _flush_command_pipe(pipe, buffer)
+            buffer += msg
+        if buffer:
+            _flush_command_pipe(pipe, buffer)
 
 
-class _RandomNameSequence:
-    """An instance of _RandomNameSequence generates an endless
-    sequence of unpredictable strings which can safely be incorporated
-    into file names.  Each string is eight characters long.  Multiple
-    threads can safely use the same instance at the same time.
+def _flush_command_pipe(pipe: IO[bytes], buffer: bytearray) -> None:
+    pipe.write(buffer)
+    pipe.flush()
+    buffer.clear()
 
-    _RandomNameSequence is an iterator."""
 
-    characters = "abcdefghijklmnopqrstuvwxyz0123456789_"
+def _random_names() -> Iterator[str]:
+    """Generate an endless sequence of unpredictable strings which can safely
+    be incorporated into file names.  Each string is six characters long."""
+    while True:
+        # 4 random bytes are 7 base32 characters (+ padding), we need 6 of them.
+        yield base64.b32encode(os.urandom(4))[:6].decode("ascii").lower()
 
-    @property
-    def rng(self) -> Random:
-        cur_pid = os.getpid()
-        if cur_pid != getattr(self, "_rng_pid", None):
-            self._rng = Random()
-            self._rng_pid = cur_pid
-        return self._rng
 
-    def __iter__(self) -> _RandomNameSequence:
-        return self
-
-    def __next__(self) -> str:
-        c = self.characters
-        choose = self.rng.choice
-        letters = [choose(c) for dummy in range(6)]
-        return "".join(letters)
+def _write_all(fd: int, data: bytes | bytearray) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
 
 
 class FileSubmitter(Submitter):
-    _names = _RandomNameSequence()
-
     def _submit(self, formatted_submittees: Iterable[FormattedSubmittee]) -> None:
         now = time.time()
 
         with self._open_checkresult_file() as fd:
+            # Collect the records and write them in large chunks instead of issuing one
+            # write() per service. We only flush at record boundaries.
+            buffer = bytearray()
+            host_name = self.host_name.encode()
             for submittee in formatted_submittees:
-                output = submittee.details.replace("\n", "\\n")
-                os.write(
-                    fd,
-                    (
-                        f"host_name={self.host_name}\n"
-                        f"service_description={submittee.name}\n"
-                        "check_type=1\n"
-                        "check_options=0\n"
-                        "reschedule_check\n"
-                        "latency=0.0\n"
-                        f"start_time={now:.1f}\n"
-                        f"finish_time={now:.1f}\n"
-                        f"return_code={submittee.state}\n"
-                        f"output={output}\n"
-                        "\n"
-                    ).encode(),
+                buffer += _CHECKRESULT_RECORD_FORMAT % (
+                    host_name,
+                    submittee.name.encode(),
+                    now,
+                    now,
+                    submittee.state,
+                    submittee.details.replace("\n", "\\n").encode(),
                 )
+                if len(buffer) >= _CHECKRESULT_WRITE_CHUNK_SIZE:
+                    _write_all(fd, buffer)
+                    buffer.clear()
+            if buffer:
+                _write_all(fd, buffer)
 
     @classmethod
     @contextmanager
@@ -284,7 +303,7 @@ class FileSubmitter(Submitter):
 
         flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW
 
-        for name, _seq in zip(cls._names, range(os.TMP_MAX)):
+        for name, _seq in zip(_random_names(), range(os.TMP_MAX)):
             filepath = os.path.join(base_dir, "c" + name)
             try:
                 checkresult_file_fd = os.open(filepath, flags, 0o600)
@@ -314,6 +333,7 @@ def _output_check_result(
     weight, state_txt = (
         ("", "PEND ") if submittee.pending else (tty.bold, tty.states[submittee.state])
     )
-    details = submittee.details.split("|", 1)[0].split("\n", 1)[0]
-    perfdata = f" ({submittee.details.split('|', 1)[1]})" if show_perfdata else ""
+    output, _sep, perftext = submittee.details.partition("|")
+    details = output.split("\n", 1)[0]
+    perfdata = f" ({perftext})" if show_perfdata else ""
     console.verbose(f"{submittee.name:<20} {weight}{state_txt}{details}{tty.normal}{perfdata}")
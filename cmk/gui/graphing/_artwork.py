@@ -158,6 +158,9 @@ def compute_graph_artwork(
     size: tuple[int, int],
     *,
     graph_display_id: str = "",
+    # Callers which already fetched the curves of the recipe and data range (see
+    # compute_graph_artwork_curves()) can pass them to avoid fetching the data again
+    curves: Sequence["Curve"] | None = None,
 ) -> GraphArtwork:
     unit_spec: UserSpecificUnit | UnitInfo
     if graph_recipe.unit_spec:
@@ -171,7 +174,9 @@ def compute_graph_artwork(
         unit_spec = get_unit_info(graph_recipe.unit)
         renderer = unit_spec.render
 
-    curves = list(compute_graph_artwork_curves(graph_recipe, graph_data_range))
+    curves = list(
+        compute_graph_artwork_curves(graph_recipe, graph_data_range) if curves is None else curves
+    )
 
     pin_time = _load_graph_pin()
     _compute_scalars(renderer, curves, pin_time)
@@ -7,6 +7,7 @@ import colorsys
 import random
 from collections import Counter
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Literal
 
 from cmk.gui.ctx_stack import g
@@ -314,6 +315,8 @@ def mix_colors(a, b):
     return tuple((ca + cb) / 2.0 for (ca, cb) in zip(a, b))
 
 
+# Many curves share the same colors, so the icons are worth caching
+@lru_cache(maxsize=256)
 def render_color_icon(color: str) -> HTML:
     return HTMLWriter.render_div(
         "",
@@ -3,13 +3,14 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-import copy
 import json
 import time
 import traceback
 from collections.abc import Iterable, Mapping, Sequence
-from dataclasses import dataclass
-from typing import Any
+from functools import lru_cache
+from typing import Any, Final
+
+from pydantic import BaseModel
 
 from livestatus import MKLivestatusNotFoundError, SiteId
 
@@ -17,6 +18,7 @@ import cmk.utils.render
 from cmk.utils.hostaddress import HostName
 from cmk.utils.paths import profile_dir
 from cmk.utils.servicename import ServiceName
+from cmk.utils.user import UserId
 
 from cmk.gui.config import active_config
 from cmk.gui.exceptions import MKMissingDataError
@@ -24,12 +26,13 @@ from cmk.gui.graphing._graph_templates import TemplateGraphSpecification
 from cmk.gui.htmllib.generator import HTMLWriter
 from cmk.gui.htmllib.html import html
 from cmk.gui.http import request, response
-from cmk.gui.i18n import _, _u
+from cmk.gui.i18n import _, _u, get_current_language
 from cmk.gui.log import logger
 from cmk.gui.logged_in import LoggedInUser, user
 from cmk.gui.pages import AjaxPage, PageResult
 from cmk.gui.sites import get_alias_of_host
 from cmk.gui.type_defs import SizePT
+from cmk.gui.utils import escaping
 from cmk.gui.utils.html import HTML
 from cmk.gui.utils.output_funnel import output_funnel
 from cmk.gui.utils.popups import MethodAjax
@@ -44,15 +47,18 @@ from ._artwork import (
     compute_curve_values_at_timestamp,
     compute_graph_artwork,
     compute_graph_artwork_curves,
+    Curve,
     get_step_label,
     GraphArtwork,
     order_graph_curves_for_legend_and_mouse_hover,
     save_graph_pin,
+    Seconds,
 )
 from ._color import render_color_icon
 from ._from_api import get_unit_info
 from ._graph_render_config import GraphRenderConfig, GraphRenderConfigBase, GraphTitleFormat
 from ._graph_specification import GraphDataRange, GraphRecipe, GraphSpecification
+from ._type_defs import GraphConsoldiationFunction
 from ._unit import user_specific_unit
 from ._utils import SizeEx
 
@@ -165,13 +171,31 @@ def _render_graph_html(
         _show_graph_html_content(graph_artwork, graph_data_range, graph_render_config)
         html_code = HTML.without_escaping(output_funnel.drain())
 
+    # The artwork contains the graph definition, which is also part of the ajax context. Dump
+    # the models only once and share the results.
+    artwork = graph_artwork.model_dump()
+    render_config = graph_render_config.model_dump()
     return HTMLWriter.render_javascript(
-        "cmk.graphs.create_graph(%s, %s, %s, %s);"
-        % (
-            json.dumps(html_code),
-            json.dumps(graph_artwork.model_dump()),
-            json.dumps(graph_render_config.model_dump()),
-            json.dumps(_graph_ajax_context(graph_artwork, graph_data_range, graph_render_config)),
+        "".join(
+            (
+                "cmk.graphs.create_graph(",
+                _json_for_script(html_code),
+                ", ",
+                _json_for_script(artwork),
+                ", ",
+                _json_for_script(render_config),
+                ", ",
+                _json_for_script(
+                    _graph_ajax_context(
+                        graph_artwork,
+                        graph_data_range,
+                        graph_render_config,
+                        definition=artwork["definition"],
+                        render_config=render_config,
+                    )
+                ),
+                ");",
+            )
         )
     )
 
@@ -184,11 +208,18 @@ def _graph_ajax_context(
     graph_artwork: GraphArtwork,
     graph_data_range: GraphDataRange,
     graph_render_config: GraphRenderConfig,
+    *,
+    definition: Mapping[str, Any] | None = None,
+    render_config: Mapping[str, Any] | None = None,
 ) -> dict[str, Any]:
     return {
-        "definition": graph_artwork.definition.model_dump(),
-        "data_range": graph_data_range.model_dump(),
-        "render_config": graph_render_config.model_dump(),
+        "definition": (graph_artwork.definition.model_dump() if definition is None else definition),
+        # The data range is not read by the javascript code, it is only passed back to us. The
+        # fields left out here fall back to their defaults when validating the context again.
+        "data_range": graph_data_range.model_dump(mode="json", exclude_defaults=True),
+        "render_config": (
+            graph_render_config.model_dump() if render_config is None else render_config
+        ),
         "display_id": graph_artwork.display_id,
     }
 
@@ -236,22 +267,18 @@ def _render_graph_title_elements(
 def _title_info_elements(
     spec_info: TemplateGraphSpecification, title_format: GraphTitleFormat
 ) -> Iterable[tuple[str, str]]:
-    if title_format.add_host_name:
+    if title_format.add_host_name or title_format.add_host_alias:
         host_url = makeuri_contextless(
             request,
             [("view_name", "hoststatus"), ("host", spec_info.host_name)],
             filename="view.py",
         )
-        yield spec_info.host_name, host_url
 
-    if title_format.add_host_alias:
-        host_alias = get_alias_of_host(spec_info.site, spec_info.host_name)
-        host_url = makeuri_contextless(
-            request,
-            [("view_name", "hoststatus"), ("host", spec_info.host_name)],
-            filename="view.py",
-        )
-        yield host_alias, host_url
+        if title_format.add_host_name:
+            yield spec_info.host_name, host_url
+
+        if title_format.add_host_alias:
+            yield get_alias_of_host(spec_info.site, spec_info.host_name), host_url
 
     if title_format.add_service_description:
         service_description = spec_info.service_description
@@ -304,15 +331,18 @@ def _show_graph_html_content(
     That is a canvas object for drawing the actual graph and also legend, buttons, resize handle,
     etc.
     """
+    preview = graph_render_config.preview
+    show_controls = graph_render_config.show_controls
+
     html.open_div(
-        class_=["graph"] + (["preview"] if graph_render_config.preview else []),
+        class_=["graph", "preview"] if preview else ["graph"],
         style=(
             f"font-size: {graph_render_config.font_size:.1f}pt;"
             f"{_graph_padding_styles(graph_render_config.show_margin)}"
         ),
     )
 
-    if graph_render_config.show_controls:
+    if show_controls:
         _show_graph_add_to_icon_for_popup(graph_artwork, graph_data_range, graph_render_config)
 
     v_axis_label = graph_artwork.vertical_axis["axis_label"]
@@ -320,13 +350,13 @@ def _show_graph_html_content(
         html.div(v_axis_label, class_="v_axis_label")
 
     # Add the floating elements
-    if graph_render_config.show_graph_time and not graph_render_config.preview:
+    if graph_render_config.show_graph_time and not preview:
         html.div(
             graph_artwork.time_axis["title"] or "",
             css=["time"] + (["inline"] if graph_render_config.show_title == "inline" else []),
         )
 
-    if graph_render_config.show_controls and graph_render_config.resizable:
+    if show_controls and graph_render_config.resizable:
         html.img(src=theme.url("images/resize_graph.png"), class_="resize")
 
     _show_html_graph_title(graph_artwork, graph_render_config)
@@ -376,7 +406,7 @@ def _show_graph_canvas(size: tuple[int, int]) -> None:
     graph_height: float = size[1] * html_size_per_ex
     html.canvas(
         "",
-        style="position: relative; width: %dpx; height: %dpx;" % (graph_width, graph_height),
+        style=f"position: relative; width: {int(graph_width)}px; height: {int(graph_height)}px;",
         width=str(graph_width * 2),
         height=str(graph_height * 2),
     )
@@ -395,21 +425,59 @@ def _render_pin_time_label(graph_artwork: GraphArtwork) -> str:
     return cmk.utils.render.date_and_time(timestamp)[:-3]
 
 
-def _get_scalars(
-    graph_artwork: GraphArtwork, graph_render_config: GraphRenderConfig
-) -> list[tuple[str, str, bool]]:
-    scalars = []
-    for scalar, title in [
+# The titles only depend on the language, no need to translate them for every graph
+@lru_cache(maxsize=8)
+def _scalar_titles(language: str) -> tuple[tuple[str, str], ...]:
+    return (
         ("min", _("Minimum")),
         ("max", _("Maximum")),
         ("average", _("Average")),
-    ]:
-        consolidation_function = graph_artwork.definition.consolidation_function
-        inactive = consolidation_function is not None and consolidation_function != scalar
+        ("last", _("Last")),
+    )
+
 
-        scalars.append((scalar, title, inactive))
+@lru_cache(maxsize=64)
+def _inactive_scalar_description(
+    language: str,
+    consolidation_function: GraphConsoldiationFunction | None,
+    scalar: str,
+    step: Seconds,
+) -> str:
+    return (
+        _(
+            'This graph is based on data consolidated with the function "%s". The '
+            'values in this column are the "%s" values of the "%s" values '
+            "aggregated in %s steps. Assuming a check interval of 1 minute, the %s "
+            "values here are based on the %s value out of %d raw values."
+        )
+        % (
+            consolidation_function,
+            scalar,
+            consolidation_function,
+            get_step_label(step),
+            scalar,
+            consolidation_function,
+            (step / 60),
+        )
+        + "\n\n"
+        + _('Click here to change the graphs consolidation function to "%s".') % scalar
+    )
 
-    scalars.append(("last", _("Last"), False))
+
+def _get_scalars(
+    graph_artwork: GraphArtwork, graph_render_config: GraphRenderConfig
+) -> list[tuple[str, str, bool]]:
+    consolidation_function = graph_artwork.definition.consolidation_function
+    scalars = [
+        (
+            scalar,
+            title,
+            scalar != "last"
+            and consolidation_function is not None
+            and consolidation_function != scalar,
+        )
+        for scalar, title in _scalar_titles(get_current_language())
+    ]
 
     if _show_pin_time(graph_artwork, graph_render_config):
         scalars.append(("pin", _render_pin_time_label(graph_artwork), False))
@@ -422,7 +490,7 @@ def _show_graph_legend(  # pylint: disable=too-many-branches
 ) -> None:
     """Render legend that describe the metrics"""
     graph_width = graph_render_config.size[0] * html_size_per_ex
-    font_size_style = "font-size: %dpt;" % graph_render_config.font_size
+    font_size_style = f"font-size: {int(graph_render_config.font_size)}pt;"
 
     scalars = _get_scalars(graph_artwork, graph_render_config)
 
@@ -440,134 +508,111 @@ def _show_graph_legend(  # pylint: disable=too-many-branches
         legend_width -= 5 * 2
         style.append("margin: 8px 5px 5px 5px")
 
-    style.append("width:%dpx" % legend_width)
+    style.append(f"width:{int(legend_width)}px")
 
     if legend_margin_left:
-        style.append("margin-left:%dpx" % legend_margin_left)
+        style.append(f"margin-left:{legend_margin_left}px")
 
-    html.open_table(class_="legend", style=style)
+    # The columns of inactive scalars are only highlighted for consolidated data
+    is_consolidated = graph_artwork.step != 60
+    scalar_classes = [
+        ["scalar", "inactive"] if inactive and is_consolidated else ["scalar"]
+        for _scalar, _title, inactive in scalars
+    ]
+
+    # The legend is rendered into a list of rows and written at once
+    rows = []
 
     # Render the title row
-    html.open_tr()
-    html.th("")
+    header_cells = [HTMLWriter.render_th("")]
     for scalar, title, inactive in scalars:
         classes = ["scalar", scalar]
-        if inactive and graph_artwork.step != 60:
-            descr = _(
-                'This graph is based on data consolidated with the function "%s". The '
-                'values in this column are the "%s" values of the "%s" values '
-                "aggregated in %s steps. Assuming a check interval of 1 minute, the %s "
-                "values here are based on the %s value out of %d raw values."
-            ) % (
+        if inactive and is_consolidated:
+            descr = _inactive_scalar_description(
+                get_current_language(),
                 graph_artwork.definition.consolidation_function,
                 scalar,
-                graph_artwork.definition.consolidation_function,
-                get_step_label(graph_artwork.step),
-                scalar,
-                graph_artwork.definition.consolidation_function,
-                (graph_artwork.step / 60),
-            )
-
-            descr += (
-                "\n\n"
-                + _('Click here to change the graphs consolidation function to "%s".') % scalar
+                graph_artwork.step,
             )
-
             classes.append("inactive")
         else:
             descr = ""
 
-        html.th(title, class_=classes, style=font_size_style, title=descr)
-    html.close_tr()
+        header_cells.append(
+            HTMLWriter.render_th(title, class_=classes, style=font_size_style, title=descr)
+        )
+    rows.append(HTMLWriter.render_tr(HTML.empty().join(header_cells)))
 
     # Render the curve related rows
     for curve in order_graph_curves_for_legend_and_mouse_hover(
         graph_artwork.definition, graph_artwork.curves
     ):
-        html.open_tr()
-        html.open_td(style=font_size_style)
-        html.write_html(render_color_icon(curve["color"]))
-        html.write_text_permissive(curve["title"])
-        html.close_td()
+        cells = [_render_legend_title_cell(curve["color"], curve["title"], font_size_style)]
+        # Note: _get_scalars() only adds the "pin" column if the pin time is shown
+        for (scalar, _title, _inactive), classes in zip(scalars, scalar_classes):
+            cells.append(
+                HTMLWriter.render_td(
+                    curve["scalars"][scalar][1], class_=classes, style=font_size_style
+                )
+            )
+        rows.append(HTMLWriter.render_tr(HTML.empty().join(cells)))
 
-        for scalar, title, inactive in scalars:
-            if scalar == "pin" and not _show_pin_time(graph_artwork, graph_render_config):
-                continue
+    # Render scalar values
+    for index, horizontal_rule in enumerate(graph_artwork.horizontal_rules):
+        rows.append(
+            HTMLWriter.render_tr(
+                _render_legend_title_cell(
+                    horizontal_rule.color, str(horizontal_rule.title), font_size_style
+                )
+                # A colspan of 5 has to be used here, since the pin that is added by a click
+                # into the graph introduces a new column.
+                + HTMLWriter.render_td(
+                    horizontal_rule.rendered_value,
+                    colspan=5,
+                    class_="scalar",
+                    style=font_size_style,
+                ),
+                class_=["scalar", "first"] if index == 0 else ["scalar"],
+            )
+        )
 
-            classes = ["scalar"]
-            if inactive and graph_artwork.step != 60:
-                classes.append("inactive")
+    html.write_html(HTMLWriter.render_table(HTML.empty().join(rows), class_="legend", style=style))
 
-            html.td(curve["scalars"][scalar][1], class_=classes, style=font_size_style)
 
-        html.close_tr()
+def _render_legend_title_cell(color: str, title: str, font_size_style: str) -> HTML:
+    return HTMLWriter.render_td(
+        render_color_icon(color) + HTML.without_escaping(escaping.escape_text(title)),
+        style=font_size_style,
+    )
 
-    # Render scalar values
-    if graph_artwork.horizontal_rules:
-        first = True
-        for horizontal_rule in graph_artwork.horizontal_rules:
-            html.open_tr(class_=["scalar"] + (["first"] if first else []))
-            html.open_td(style=font_size_style)
-            html.write_html(render_color_icon(horizontal_rule.color))
-            html.write_text_permissive(str(horizontal_rule.title))
-            html.close_td()
-
-            # A colspan of 5 has to be used here, since the pin that is added by a click into
-            # the graph introduces a new column.
-            html.td(
-                horizontal_rule.rendered_value,
-                colspan=5,
-                class_="scalar",
-                style=font_size_style,
-            )
-            html.close_tr()
-            first = False
 
-    html.close_table()
+# top, right, bottom, left
+_Bounds = tuple[int, int, int, int]
+_GRAPH_MARGIN_EX: Final[_Bounds] = (
+    int(round(8 / html_size_per_ex)),
+    int(round(16 / html_size_per_ex)),
+    int(round(4 / html_size_per_ex)),
+    int(round(8 / html_size_per_ex)),
+)
+_GRAPH_NO_MARGIN_EX: Final[_Bounds] = (0, 0, 0, 0)
 
 
-@dataclass(frozen=True, kw_only=True)
-class Bounds:
-    top: int
-    right: int
-    bottom: int
-    left: int
+def _graph_margin_ex(show_margin: bool) -> _Bounds:
+    return _GRAPH_MARGIN_EX if show_margin else _GRAPH_NO_MARGIN_EX
 
 
-def _graph_padding_styles(show_margin: bool) -> str:
-    bounds = _graph_margin_ex(show_margin)
-    return (
-        "padding: "
-        f"{bounds.top:.2f}ex "
-        f"{bounds.right:.2f}ex "
-        f"{bounds.bottom:.2f}ex "
-        f"{bounds.left:.2f}ex;"
-    )
+def _padding_styles(bounds: _Bounds) -> str:
+    top, right, bottom, left = bounds
+    return f"padding: {top:.2f}ex {right:.2f}ex {bottom:.2f}ex {left:.2f}ex;"
 
 
-def _graph_margin_ex(
-    show_margin: bool,
-    *,
-    top: int = 8,
-    right: int = 16,
-    bottom: int = 4,
-    left: int = 8,
-) -> Bounds:
-    return (
-        Bounds(
-            top=int(round(top / html_size_per_ex)),
-            right=int(round(right / html_size_per_ex)),
-            bottom=int(round(bottom / html_size_per_ex)),
-            left=int(round(left / html_size_per_ex)),
-        )
-        if show_margin
-        else Bounds(
-            top=0,
-            right=0,
-            bottom=0,
-            left=0,
-        )
-    )
+# There are only two possible results, no need to format them for every graph
+_GRAPH_MARGIN_PADDING_STYLES: Final = _padding_styles(_GRAPH_MARGIN_EX)
+_GRAPH_NO_MARGIN_PADDING_STYLES: Final = _padding_styles(_GRAPH_NO_MARGIN_EX)
+
+
+def _graph_padding_styles(show_margin: bool) -> str:
+    return _GRAPH_MARGIN_PADDING_STYLES if show_margin else _GRAPH_NO_MARGIN_PADDING_STYLES
 
 
 # NOTE
@@ -666,7 +711,7 @@ def _render_ajax_graph(context: Mapping[str, Any]) -> dict[str, Any]:
         "context": {
             "graph_id": context["graph_id"],
             "definition": graph_recipe.model_dump(),
-            "data_range": graph_data_range.model_dump(),
+            "data_range": graph_data_range.model_dump(mode="json", exclude_defaults=True),
             "render_config": graph_render_config.model_dump(),
         },
     }
@@ -705,23 +750,33 @@ class UserGraphDataRangeStore:
         ).unlink(missing_ok=True)
 
 
+class _GraphRecipeError(Exception):
+    """Carries the rendered error message in case the graph recipes cannot be calculated"""
+
+    def __init__(self, error_html: HTML) -> None:
+        super().__init__(error_html)
+        self.error_html = error_html
+
+
 def _resolve_graph_recipe_with_error_handling(
     graph_specification: GraphSpecification,
-) -> Sequence[GraphRecipe] | HTML:
+) -> Sequence[GraphRecipe]:
     try:
         return graph_specification.recipes()
     except MKLivestatusNotFoundError:
-        return render_graph_error_html(
-            "%s\n\n%s: %r"
-            % (
-                _("Cannot fetch data via Livestatus"),
-                _("The graph specification is"),
-                graph_specification,
-            ),
-            _("Cannot calculate graph recipes"),
+        raise _GraphRecipeError(
+            render_graph_error_html(
+                "%s\n\n%s: %r"
+                % (
+                    _("Cannot fetch data via Livestatus"),
+                    _("The graph specification is"),
+                    graph_specification,
+                ),
+                _("Cannot calculate graph recipes"),
+            )
         )
     except Exception as e:
-        return render_graph_error_html(e, _("Cannot calculate graph recipes"))
+        raise _GraphRecipeError(render_graph_error_html(e, _("Cannot calculate graph recipes")))
 
 
 def render_graphs_from_specification_html(
@@ -732,9 +787,10 @@ def render_graphs_from_specification_html(
     render_async: bool = True,
     graph_display_id: str = "",
 ) -> HTML:
-    graph_recipes = _resolve_graph_recipe_with_error_handling(graph_specification)
-    if isinstance(graph_recipes, HTML):
-        return graph_recipes  # This is to html.write the exception
+    try:
+        graph_recipes = _resolve_graph_recipe_with_error_handling(graph_specification)
+    except _GraphRecipeError as e:
+        return e.error_html  # This is to html.write the exception
 
     return _render_graphs_from_definitions(
         graph_recipes,
@@ -753,30 +809,64 @@ def _render_graphs_from_definitions(
     render_async: bool = True,
     graph_display_id: str = "",
 ) -> HTML:
-    output = HTML.empty()
+    if not graph_recipes:
+        return HTML.empty()
+
+    # The graphs usually share the render config, so serialize it only once
+    render_config_json = (
+        _json_for_script(graph_render_config.model_dump()) if render_async else None
+    )
+
+    output = []
     for graph_recipe in graph_recipes:
-        recipe_specific_render_config = graph_render_config.model_copy(
-            update=dict(graph_recipe.render_options)
-        )
-        recipe_specific_data_range = graph_data_range.model_copy(
-            update=dict(graph_recipe.data_range or {})
+        recipe_specific_data_range, recipe_specific_render_config = _recipe_specific_options(
+            graph_recipe, graph_data_range, graph_render_config
         )
 
         if render_async:
-            output += _render_graph_container_html(
-                graph_recipe,
-                recipe_specific_data_range,
-                recipe_specific_render_config,
-                graph_display_id=graph_display_id,
+            output.append(
+                _render_graph_container_html(
+                    graph_recipe,
+                    recipe_specific_data_range,
+                    recipe_specific_render_config,
+                    graph_display_id=graph_display_id,
+                    render_config_json=(
+                        render_config_json
+                        if recipe_specific_render_config is graph_render_config
+                        else None
+                    ),
+                )
             )
         else:
-            output += _render_graph_content_html(
-                graph_recipe,
-                recipe_specific_data_range,
-                recipe_specific_render_config,
-                graph_display_id=graph_display_id,
+            output.append(
+                _render_graph_content_html(
+                    graph_recipe,
+                    recipe_specific_data_range,
+                    recipe_specific_render_config,
+                    graph_display_id=graph_display_id,
+                )
             )
-    return output
+    return HTML.empty().join(output)
+
+
+def _recipe_specific_options(
+    graph_recipe: GraphRecipe,
+    graph_data_range: GraphDataRange,
+    graph_render_config: GraphRenderConfig,
+) -> tuple[GraphDataRange, GraphRenderConfig]:
+    # Most recipes don't override anything, no need to copy the models for them
+    return (
+        (
+            graph_data_range.model_copy(update=dict(graph_recipe.data_range))
+            if graph_recipe.data_range is not None
+            else graph_data_range
+        ),
+        (
+            graph_render_config.model_copy(update=dict(graph_recipe.render_options))
+            if graph_recipe.render_options
+            else graph_render_config
+        ),
+    )
 
 
 # cmk.graphs.load_graph_content will call ajax_render_graph_content() via JSON to finally load the graph
@@ -786,6 +876,7 @@ def _render_graph_container_html(
     graph_render_config: GraphRenderConfig,
     *,
     graph_display_id: str,
+    render_config_json: str | None = None,
 ) -> HTML:
     # Estimate size of graph. This will not be the exact size of the graph, because
     # this does calculate the size of the canvas area and does not take e.g. the legend
@@ -795,7 +886,7 @@ def _render_graph_container_html(
     graph_height = graph_render_config.size[1] * html_size_per_ex
 
     content = HTMLWriter.render_div("", class_="title") + HTMLWriter.render_div(
-        "", class_="content", style="width:%dpx;height:%dpx" % (graph_width, graph_height)
+        "", class_="content", style=f"width:{int(graph_width)}px;height:{int(graph_height)}px"
     )
 
     output = HTMLWriter.render_div(
@@ -803,12 +894,22 @@ def _render_graph_container_html(
         class_="graph_load_container",
     )
     output += HTMLWriter.render_javascript(
-        "cmk.graphs.load_graph_content(%s, %s, %s, %s)"
-        % (
-            json.dumps(graph_recipe.model_dump()),
-            json.dumps(graph_data_range.model_dump()),
-            json.dumps(graph_render_config.model_dump()),
-            json.dumps(graph_display_id),
+        "".join(
+            (
+                "cmk.graphs.load_graph_content(",
+                _json_for_script(graph_recipe.model_dump()),
+                ", ",
+                _json_for_script(graph_data_range.model_dump()),
+                ", ",
+                (
+                    _json_for_script(graph_render_config.model_dump())
+                    if render_config_json is None
+                    else render_config_json
+                ),
+                ", ",
+                _json_for_script(graph_display_id),
+                ")",
+            )
         )
     )
 
@@ -818,6 +919,15 @@ def _render_graph_container_html(
     return output
 
 
+def _json_for_script(value: object) -> str:
+    # Used for the arguments of all graph javascript calls, so they are serialized the same way.
+    # Pass the models dumped in python mode: pydantic's JSON serialization writes infinite values
+    # (e.g. of horizontal rules) as null, json.dumps() keeps them as Infinity and escapes non-ASCII
+    # characters. Our patched version also escapes the slashes (see cmk.gui.utils.json), so that
+    # the JSON can safely be embedded into <script> tags.
+    return json.dumps(value)
+
+
 class AjaxRenderGraphContent(AjaxPage):
     @classmethod
     def ident(cls) -> str:
@@ -841,22 +951,22 @@ def _render_graph_content_html(
     graph_render_config: GraphRenderConfig,
     *,
     graph_display_id: str = "",
+    curves: Sequence[Curve] | None = None,
 ) -> HTML:
-    output = HTML.empty()
-
     try:
         graph_artwork = compute_graph_artwork(
             graph_recipe,
             graph_data_range,
             graph_render_config.size,
             graph_display_id=graph_display_id,
+            curves=curves,
         )
         main_graph_html = _render_graph_or_error_html(
             graph_artwork, graph_data_range, graph_render_config
         )
 
         if graph_render_config.show_time_range_previews:
-            output += HTMLWriter.render_div(
+            return HTMLWriter.render_div(
                 main_graph_html
                 + _render_time_range_selection(
                     graph_recipe,
@@ -865,19 +975,17 @@ def _render_graph_content_html(
                 ),
                 class_="graph_with_timeranges",
             )
-        else:
-            output += main_graph_html
+        return main_graph_html
 
     except MKLivestatusNotFoundError:
-        output += render_graph_error_html(
+        return render_graph_error_html(
             _("Cannot fetch data via Livestatus"), _("Cannot create graph")
         )
     except MKMissingDataError as e:
         return html.render_message(str(e))
 
     except Exception as e:
-        output += render_graph_error_html(e, _("Cannot create graph"))
-    return output
+        return render_graph_error_html(e, _("Cannot create graph"))
 
 
 def _render_time_range_selection(
@@ -887,46 +995,52 @@ def _render_time_range_selection(
     graph_display_id: str,
 ) -> HTML:
     now = int(time.time())
-    graph_render_config = copy.deepcopy(graph_render_config)
+    preview_size = (20, 4)
+    preview_render_config = graph_render_config.model_copy(
+        update={
+            "size": preview_size,
+            "font_size": SizePT(6.0),
+            "fixed_timerange": True,  # Do not follow timerange changes of other graphs
+            "show_legend": False,
+            "show_controls": False,
+            "preview": True,
+            "resizable": False,
+            "interaction": False,
+        }
+    )
     rows = []
     for timerange_attrs in active_config.graph_timeranges:
         duration = timerange_attrs["duration"]
         assert isinstance(duration, int)
 
-        graph_render_config.size = (20, 4)
-        graph_render_config.font_size = SizePT(6.0)
-        graph_render_config.onclick = "cmk.graphs.change_graph_timerange(graph, %d)" % duration
-        graph_render_config.fixed_timerange = (
-            True  # Do not follow timerange changes of other graphs
+        timerange_render_config = preview_render_config.model_copy(
+            update={
+                "onclick": "cmk.graphs.change_graph_timerange(graph, %d)" % duration,
+                "explicit_title": timerange_attrs["title"],
+            }
         )
-        graph_render_config.explicit_title = timerange_attrs["title"]
-        graph_render_config.show_legend = False
-        graph_render_config.show_controls = False
-        graph_render_config.preview = True
-        graph_render_config.resizable = False
-        graph_render_config.interaction = False
 
         timerange = now - duration, now
         graph_data_range = GraphDataRange(
             time_range=timerange,
-            step=2 * estimate_graph_step_for_html(timerange, graph_render_config.size[1]),
+            step=2 * estimate_graph_step_for_html(timerange, preview_size[1]),
         )
 
         graph_artwork = compute_graph_artwork(
             graph_recipe,
             graph_data_range,
-            graph_render_config.size,
+            preview_size,
             graph_display_id=graph_display_id,
         )
         rows.append(
-            HTMLWriter.render_td(
-                _render_graph_html(graph_artwork, graph_data_range, graph_render_config),
-                title=_("Change graph time range to: %s") % timerange_attrs["title"],
+            HTMLWriter.render_tr(
+                HTMLWriter.render_td(
+                    _render_graph_html(graph_artwork, graph_data_range, timerange_render_config),
+                    title=_("Change graph time range to: %s") % timerange_attrs["title"],
+                )
             )
         )
-    return HTMLWriter.render_table(
-        HTML.empty().join(HTMLWriter.render_tr(content) for content in rows), class_="timeranges"
-    )
+    return HTMLWriter.render_table(HTML.empty().join(rows), class_="timeranges")
 
 
 def make_graph_data_range(
@@ -939,13 +1053,14 @@ def make_graph_data_range(
     )
 
 
+_STEPS_PER_EX: Final = html_size_per_ex * 4
+
+
 def estimate_graph_step_for_html(
     time_range: tuple[int, int],
     width_in_ex: int,
 ) -> int:
-    steps_per_ex = html_size_per_ex * 4
-    number_of_steps = width_in_ex * steps_per_ex
-    return int((time_range[1] - time_range[0]) / number_of_steps)
+    return int((time_range[1] - time_range[0]) / (width_in_ex * _STEPS_PER_EX))
 
 
 # .
@@ -976,8 +1091,7 @@ class AjaxGraphHover(cmk.gui.pages.Page):
         """Registered as `ajax_graph_hover`."""
         response.set_content_type("application/json")
         try:
-            context_var = request.get_str_input_mandatory("context")
-            context = json.loads(context_var)
+            context = request.get_model_mandatory(_GraphHoverContext, "context")
             hover_time = request.get_integer_input_mandatory("hover_time")
             response_data = _render_ajax_graph_hover(context, hover_time)
             response.set_data(json.dumps(response_data))
@@ -989,14 +1103,19 @@ class AjaxGraphHover(cmk.gui.pages.Page):
         return None
 
 
+# The part of the ajax context (see _graph_ajax_context()) needed for the hover. The context is
+# parsed directly into the models, the other entries are ignored.
+class _GraphHoverContext(BaseModel, frozen=True):
+    definition: GraphRecipe
+    data_range: GraphDataRange
+
+
 def _render_ajax_graph_hover(
-    context: Mapping[str, Any],
+    context: _GraphHoverContext,
     hover_time: int,
 ) -> dict[str, object]:
-    graph_data_range = GraphDataRange.model_validate(context["data_range"])
-    graph_recipe = GraphRecipe.model_validate(context["definition"])
-
-    curves = compute_graph_artwork_curves(graph_recipe, graph_data_range)
+    graph_recipe = context.definition
+    curves = _graph_hover_curves(context)
 
     return {
         "rendered_hover_time": cmk.utils.render.date_and_time(hover_time),
@@ -1018,6 +1137,41 @@ def _render_ajax_graph_hover(
     }
 
 
+# While the mouse moves over a graph, the same curves are requested over and over again, only the
+# hover time changes. Keep them for a short time to avoid fetching the RRD data again for every
+# mouse move. The cache is process local and keyed by the user, since the data depends on the
+# permissions of the user.
+_HOVER_CURVES_CACHE_TTL: Final = 30.0
+_HOVER_CURVES_CACHE_SIZE: Final = 32
+_hover_curves_cache: dict[tuple[UserId | None, str, str], tuple[float, list[Curve]]] = {}
+
+
+def _graph_hover_curves(context: _GraphHoverContext) -> list[Curve]:
+    now = time.time()
+    key = (user.id, context.definition.model_dump_json(), context.data_range.model_dump_json())
+    if (cached := _hover_curves_cache.get(key)) is not None:
+        cache_time, curves = cached
+        if now - cache_time < _HOVER_CURVES_CACHE_TTL:
+            return curves
+
+    curves = compute_graph_artwork_curves(context.definition, context.data_range)
+
+    # Re-insert refreshed entries, so that they are not the next ones dropped as the oldest
+    _hover_curves_cache.pop(key, None)
+    if len(_hover_curves_cache) >= _HOVER_CURVES_CACHE_SIZE:
+        for cache_key, (cache_time, _curves) in list(_hover_curves_cache.items()):
+            if now - cache_time >= _HOVER_CURVES_CACHE_TTL:
+                _hover_curves_cache.pop(cache_key, None)
+    # Drop the oldest entry, dicts keep the insertion order. Another thread may have emptied the
+    # cache in the meantime.
+    if len(_hover_curves_cache) >= _HOVER_CURVES_CACHE_SIZE and (
+        (oldest_key := next(iter(_hover_curves_cache), None)) is not None
+    ):
+        _hover_curves_cache.pop(oldest_key, None)
+    _hover_curves_cache[key] = (now, curves)
+    return curves
+
+
 # Estimates the height of the graph legend in pixels
 # TODO: This is not acurate! Especially when the font size is changed this does not lead to correct
 # results. But this is a more generic problem of the html_size_per_ex which is hard coded instead
@@ -1028,7 +1182,7 @@ def _graph_legend_height_ex(
     if not _graph_legend_enabled(graph_render_config, graph_artwork):
         return 0.0
     # Add header line + spacing: '3.0'
-    return 3.0 + (len(list(graph_artwork.curves)) + len(graph_artwork.horizontal_rules)) * 1.3
+    return 3.0 + (len(graph_artwork.curves) + len(graph_artwork.horizontal_rules)) * 1.3
 
 
 # .
@@ -1078,46 +1232,53 @@ def host_service_graph_dashlet_cmk(
     height_var = request.get_float_input_mandatory("height", 0.0)
     height = int(height_var / html_size_per_ex)
 
-    bounds = _graph_margin_ex(graph_render_config.show_margin)
+    margin_top, margin_right, margin_bottom, margin_left = _graph_margin_ex(
+        graph_render_config.show_margin
+    )
     height -= _graph_title_height_ex(graph_render_config)
-    height -= bounds.top + bounds.bottom
-    width -= bounds.left + bounds.right
+    height -= margin_top + margin_bottom
+    width -= margin_left + margin_right
 
     graph_render_config.size = (width, height)
 
     time_range: TimerangeValue = json.loads(request.get_str_input_mandatory("timerange"))
 
-    end_time: float
-    start_time: float
-    # Age and Range like ["age", 300] and ['date', [1661896800, 1661896800]]
+    # Age and Range like ["age", 300] and ['date', [1661896800, 1661896800]] arrive as lists, but
+    # compute_range needs tuples for computation. Age like 14400 and y1, d1,... are passed as is.
     if isinstance(time_range, list):
-        # compute_range needs tuple for computation
-        timerange_tuple: tuple[str, Any] = (time_range[0], time_range[1])
-        start_time, end_time = Timerange.compute_range(timerange_tuple).range
-    # Age like 14400 and y1, d1,...
-    else:
-        start_time, end_time = Timerange.compute_range(time_range).range
+        time_range = (time_range[0], time_range[1])
+    start_time, end_time = Timerange.compute_range(time_range).range
 
     graph_data_range = make_graph_data_range((start_time, end_time), graph_render_config.size[1])
 
-    graph_recipes = _resolve_graph_recipe_with_error_handling(graph_specification)
-    if isinstance(graph_recipes, HTML):
-        return graph_recipes  # This is to html.write the exception
+    try:
+        graph_recipes = _resolve_graph_recipe_with_error_handling(graph_specification)
+    except _GraphRecipeError as e:
+        return e.error_html  # This is to html.write the exception
     if graph_recipes:
         graph_recipe = graph_recipes[0]
     else:
         raise MKGeneralException(_("Failed to calculate a graph recipe."))
 
+    graph_data_range, graph_render_config = _recipe_specific_options(
+        graph_recipe, graph_data_range, graph_render_config
+    )
+
     # When the legend is enabled, we need to reduce the height by the height of the legend to
     # make the graph fit into the dashlet area.
+    curves: list[Curve] | None = None
     if graph_render_config.show_legend:
-        # TODO FIXME: This graph artwork is calulated twice. Once here and once in render_graphs_from_specification_html()
-        graph_artwork = compute_graph_artwork(
-            graph_recipe,
-            graph_data_range,
-            graph_render_config.size,
-        )
-        if graph_artwork.curves:
+        # The final artwork depends on the reduced height. Fetch the curves only once and use them
+        # for both computations.
+        curves = list(compute_graph_artwork_curves(graph_recipe, graph_data_range))
+        # Without curves there is no legend to make room for
+        if curves:
+            graph_artwork = compute_graph_artwork(
+                graph_recipe,
+                graph_data_range,
+                graph_render_config.size,
+                curves=curves,
+            )
             legend_height = _graph_legend_height_ex(
                 graph_render_config,
                 graph_artwork,
@@ -1134,12 +1295,12 @@ def host_service_graph_dashlet_cmk(
                 return None
             graph_render_config.size = (width, graph_height)
 
-    html_code = _render_graphs_from_definitions(
-        [graph_recipe],
+    html_code = _render_graph_content_html(
+        graph_recipe,
         graph_data_range,
         graph_render_config,
-        render_async=False,
         graph_display_id=graph_display_id,
+        curves=curves,
     )
     html.write_html(html_code)
     return None
@@ -14,8 +14,8 @@ from cmk.gui.ctx_stack import request_local_attr
 class OutputFunnel:
     """Provides writing to the response object or a plugged response
 
-    Manages a stack of response objects. Calls to write() will always
-    write the given string to the topmost request object. It is used
+    Manages a stack of plugged outputs on top of the response object. Calls to write() will
+    always write the given string to the topmost plug (or the response). It is used
     like this:
 
         # Write "xyz" to response which is sent to the client
@@ -29,32 +29,39 @@ class OutputFunnel:
     """
 
     def __init__(self, response: Response) -> None:
-        self._response_stack: list[Response] = [response]
+        self._response = response
+        # The plugged outputs are only collected and joined when they are drained or unplugged.
+        # A plain list is much cheaper to write to than a response stream.
+        self._plugs: list[list[bytes]] = []
 
     def write(self, data: bytes) -> None:
-        self._response_stack[-1].stream.write(data)
+        if self._plugs:
+            self._plugs[-1].append(data)
+        else:
+            self._response.stream.write(data)
 
     @contextmanager
     def plugged(self) -> Iterator[None]:
-        self._response_stack.append(Response())
+        self._plugs.append([])
         try:
             yield
         finally:
-            response = self._response_stack.pop()
+            plug = self._plugs.pop()
             # Rest of popped response is written to now topmost request.
             # TODO: Investigate call sites whether or not this is a used feature
-            self.write(response.get_data())
+            self.write(b"".join(plug))
 
     def _is_plugged(self) -> bool:
-        return len(self._response_stack) > 1
+        return bool(self._plugs)
 
     def drain(self) -> str:
         """Return the content of the topmost response object"""
         if not self._is_plugged():
             return ""
 
-        text = self._response_stack.pop().get_data(as_text=True)
-        self._response_stack.append(Response())
+        plug = self._plugs[-1]
+        text = b"".join(plug).decode("utf-8")
+        plug.clear()
         return text
 
 
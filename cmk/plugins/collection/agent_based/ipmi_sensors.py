@@ -3,8 +3,9 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import re
 from collections.abc import Mapping
-from typing import Any, NamedTuple
+from typing import Any, Final, NamedTuple
 
 from cmk.agent_based.v2 import (
     AgentSection,
@@ -17,15 +18,16 @@ from cmk.agent_based.v2 import (
 )
 from cmk.plugins.lib import ipmi as ipmi_utils
 
-_NA_VALUES = {"NA", "N/A"}
+_NA_VALUES: Final = frozenset({"NA", "N/A"})
 
+_STRIP_CHARS: Final = " \n\t\x00"
 
-def _na_str(str_value: str) -> str:
-    return "" if str_value in _NA_VALUES else str_value
-
-
-def _na_float(str_value: str) -> float | None:
-    return None if str_value in _NA_VALUES else float(str_value)
+_READING_LEVELS: Final = re.compile(
+    # 339 Voltage_3.3VCC 3.33_V_(NA/NA) [OK]
+    r"([^_(]*)_([^_(]*)[^(]*\(([^/()]*)/([^/()]*)\)"
+    # 59 M2_Temp0(PCIe1)_(Temperature) NA/79.00_41.00_C [OK]
+    r"|([^/_(]*)/([^/_(]*)_([^_(]*)_([^_(]*)(?:_[^(]*)?"
+)
 
 
 class Status(NamedTuple):
@@ -54,10 +56,14 @@ def parse_ipmi_sensors(string_table: StringTable) -> ipmi_utils.Section:
     if string_table[0][0].strip() == "ID":
         string_table = string_table[1:]
 
+    # This runs for every sensor line, so the "NA" handling is inlined below.
+    na_values = _NA_VALUES
     section: ipmi_utils.Section = {}
+    setdefault = section.setdefault
+    parse_state = ipmi_utils.Sensor.parse_state
     for line in string_table:
         _sid, sensorname, *reading_levels_and_more, status_txt = (
-            x.strip(" \n\t\x00") for x in line
+            x.strip(_STRIP_CHARS) for x in line
         )
         status_from_text = _parse_status_txt(status_txt)
         sensorname = sensorname.replace(" ", "_")
@@ -65,47 +71,45 @@ def parse_ipmi_sensors(string_table: StringTable) -> ipmi_utils.Section:
         if not status_from_text.is_ok and sensorname not in section:
             continue
 
-        sensor = section.setdefault(
+        sensor = setdefault(
             sensorname,
             ipmi_utils.Sensor(status_txt=status_from_text.txt, unit=""),
         )
 
         match reading_levels_and_more:
             case [reading_levels]:
-                if "(" in reading_levels:
-                    # 339 Voltage_3.3VCC 3.33_V_(NA/NA) [OK]
-                    reading, levels = reading_levels[:-1].split("(")
-                else:
-                    # 59 M2_Temp0(PCIe1)_(Temperature) NA/79.00_41.00_C [OK]
-                    levels, reading = reading_levels.split("_", 1)
-
-                value, unit, *_ = reading.split("_")
-                lower, upper = levels.split("/")
-
-                sensor.value = _na_float(value)
-                sensor.unit = _na_str(unit)
-                sensor.crit_low = _na_float(lower)
-                sensor.crit_high = _na_float(upper)
+                if (reading_match := _READING_LEVELS.fullmatch(reading_levels)) is None:
+                    raise ValueError(reading_levels)
+                value, unit, lower, upper = (
+                    reading_match.group(1, 2, 3, 4)
+                    if reading_match.group(1) is not None
+                    else reading_match.group(7, 8, 5, 6)
+                )
+
+                sensor.value = None if value in na_values else float(value)
+                sensor.unit = "" if unit in na_values else unit
+                sensor.crit_low = None if lower in na_values else float(lower)
+                sensor.crit_high = None if upper in na_values else float(upper)
 
             case [type_, value, unit]:
-                sensor.value = _na_float(value)
-                sensor.unit = _na_str(unit)
+                sensor.value = None if value in na_values else float(value)
+                sensor.unit = "" if unit in na_values else unit
                 sensor.type_ = type_
 
             case [type_, status, value, unit]:
-                sensor.state = ipmi_utils.Sensor.parse_state(status)
-                sensor.value = _na_float(value)
-                sensor.unit = _na_str(unit)
+                sensor.state = parse_state(status)
+                sensor.value = None if value in na_values else float(value)
+                sensor.unit = "" if unit in na_values else unit
                 sensor.type_ = type_
 
             case [type_, status, value, unit, _, lower_c, lower_nc, upper_nc, upper_c, _]:
-                sensor.value = _na_float(value)
-                sensor.unit = _na_str(unit)
-                sensor.state = ipmi_utils.Sensor.parse_state(status)
-                sensor.crit_low = _na_float(lower_c)
-                sensor.warn_low = _na_float(lower_nc)
-                sensor.warn_high = _na_float(upper_nc)
-                sensor.crit_high = _na_float(upper_c)
+                sensor.value = None if value in na_values else float(value)
+                sensor.unit = "" if unit in na_values else unit
+                sensor.state = parse_state(status)
+                sensor.crit_low = None if lower_c in na_values else float(lower_c)
+                sensor.warn_low = None if lower_nc in na_values else float(lower_nc)
+                sensor.warn_high = None if upper_nc in na_values else float(upper_nc)
+                sensor.crit_high = None if upper_c in na_values else float(upper_c)
                 sensor.type_ = type_
 
     return section
@@ -130,39 +134,44 @@ def discover_ipmi_sensors(
     yield from ipmi_utils.discover_individual_sensors(ignore_params, section)
 
 
+_STATUS_TXT_STATES: Final = {
+    "ok": State.OK,
+    "warning": State.WARN,
+    "critical": State.CRIT,
+    "failed": State.CRIT,
+    "unknown": State.UNKNOWN,
+}
+
+_OK_STATUS_TXTS: Final = frozenset(
+    {
+        "entity present",
+        "battery presence detected",
+        "drive presence",
+        "transition to running",
+        "device enabled",
+        "system full operational, working",
+        "system restart",
+        "present",
+        "transition to ok",
+    }
+)
+# These are matched case sensitively
+_OK_STATUS_TXT_PREFIXES: Final = ("Fully Redundant",)
+_OK_STATUS_TXT_SUFFIXES: Final = ("is connected", "Presence detected", "Device Present")
+
+
 def _status_txt_mapping(status_txt: str) -> State:
-    state = {
-        "ok": State.OK,
-        "warning": State.WARN,
-        "critical": State.CRIT,
-        "failed": State.CRIT,
-        "unknown": State.UNKNOWN,
-    }.get(status_txt.lower())
-    if state is not None:
+    status_txt_lower = status_txt.lower()
+    if (state := _STATUS_TXT_STATES.get(status_txt_lower)) is not None:
         return state
 
-    if "non-critical" in status_txt.lower():
-        return State.WARN
-    if status_txt.lower().startswith("nc"):
+    if "non-critical" in status_txt_lower or status_txt_lower.startswith("nc"):
         return State.WARN
 
     if (
-        status_txt.lower()
-        in [
-            "entity present",
-            "battery presence detected",
-            "drive presence",
-            "transition to running",
-            "device enabled",
-            "system full operational, working",
-            "system restart",
-            "present",
-            "transition to ok",
-        ]
-        or status_txt.startswith("Fully Redundant")
-        or status_txt.endswith("is connected")
-        or status_txt.endswith("Presence detected")
-        or status_txt.endswith("Device Present")
+        status_txt_lower in _OK_STATUS_TXTS
+        or status_txt.startswith(_OK_STATUS_TXT_PREFIXES)
+        or status_txt.endswith(_OK_STATUS_TXT_SUFFIXES)
     ):
         return State.OK
     return State.CRIT
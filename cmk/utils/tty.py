@@ -142,8 +142,9 @@ def print_table(
     lengths = _column_lengths(headers, rows)
     dashes = ["-" * l for l in lengths]
     fmt = _row_template(lengths, colors, indent)
-    for row in itertools.chain([headers, dashes], rows):
-        sys.stdout.write(fmt % tuple(row[:num_columns]))
+    sys.stdout.write(
+        "".join(fmt % tuple(row[:num_columns]) for row in itertools.chain([headers, dashes], rows))
+    )
 
 
 def _column_lengths(headers: TableRow, rows: Iterable[TableRow]) -> list[int]:
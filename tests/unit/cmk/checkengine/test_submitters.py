@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import io
+import select
+from collections.abc import Sequence
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.checkengine.submitters import (
+    _CHECKRESULT_WRITE_CHUNK_SIZE,
+    FileSubmitter,
+    FormattedSubmittee,
+    PipeSubmitter,
+)
+
+
+class _RecordingPipe(io.BytesIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes: list[bytes] = []
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self.writes.append(bytes(data))
+        return super().write(data)
+
+
+def _submittees(details: Sequence[str]) -> list[FormattedSubmittee]:
+    return [
+        FormattedSubmittee(
+            name=f"Service {n}",
+            state=n % 4,
+            details=d,
+            cache_info=None,
+            pending=False,
+        )
+        for n, d in enumerate(details)
+    ]
+
+
+@pytest.fixture(name="pipe")
+def fixture_pipe(monkeypatch: pytest.MonkeyPatch) -> _RecordingPipe:
+    pipe = _RecordingPipe()
+    monkeypatch.setattr(PipeSubmitter, "_nagios_command_pipe", pipe)
+    monkeypatch.setattr("cmk.checkengine.submitters.time.time", lambda: 1234567890.0)
+    return pipe
+
+
+def _expected_commands(submittees: Sequence[FormattedSubmittee]) -> list[bytes]:
+    return [
+        b"[1234567890] PROCESS_SERVICE_CHECK_RESULT;heute;%s;%d;%s\n"
+        % (s.name.encode(), s.state, s.details.replace("\n", "\\n").encode())
+        for s in submittees
+    ]
+
+
+def test_pipe_submitter_batches_whole_commands(pipe: _RecordingPipe) -> None:
+    submittees = _submittees([f"OK - line {n}\nmore details|metric={n};;;;" for n in range(500)])
+
+    PipeSubmitter(HostName("heute"), perfdata_format="standard", show_perfdata=False)._submit(
+        submittees
+    )
+
+    assert 1 < len(pipe.writes) < len(submittees)
+    assert all(len(w) <= select.PIPE_BUF for w in pipe.writes)
+    assert [c for w in pipe.writes for c in w.splitlines(keepends=True)] == _expected_commands(
+        submittees
+    )
+
+
+def test_pipe_submitter_writes_oversized_command(pipe: _RecordingPipe) -> None:
+    submittees = _submittees(["short", "x" * (2 * select.PIPE_BUF), "short again"])
+
+    PipeSubmitter(HostName("heute"), perfdata_format="standard", show_perfdata=False)._submit(
+        submittees
+    )
+
+    assert pipe.writes == _expected_commands(submittees)
+
+
+def test_file_submitter_writes_all_chunks(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("cmk.utils.paths.check_result_path", str(tmp_path))
+    monkeypatch.setattr("cmk.checkengine.submitters.time.time", lambda: 1234567890.0)
+    submittees = _submittees([f"OK - line {n}\n{'x' * n}|metric={n};;;;" for n in range(1000)])
+
+    FileSubmitter(HostName("heute"), perfdata_format="standard", show_perfdata=False)._submit(
+        submittees
+    )
+
+    expected = b"".join(
+        b"host_name=heute\n"
+        b"service_description=%s\n"
+        b"check_type=1\n"
+        b"check_options=0\n"
+        b"reschedule_check\n"
+        b"latency=0.0\n"
+        b"start_time=1234567890.0\n"
+        b"finish_time=1234567890.0\n"
+        b"return_code=%d\n"
+        b"output=%s\n"
+        b"\n" % (s.name.encode(), s.state, s.details.replace("\n", "\\n").encode())
+        for s in submittees
+    )
+    assert len(expected) > 2 * _CHECKRESULT_WRITE_CHUNK_SIZE
+    (checkresult_file,) = (p for p in tmp_path.iterdir() if p.suffix != ".ok")
+    assert checkresult_file.read_bytes() == expected
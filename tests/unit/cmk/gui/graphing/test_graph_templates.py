@@ -5,6 +5,7 @@
 
 # pylint: disable=protected-access
 
+import itertools
 from collections.abc import Sequence
 from dataclasses import dataclass, field
 from typing import Literal
@@ -36,7 +37,7 @@ from cmk.gui.graphing._type_defs import Original, TranslatedMetric
 from cmk.gui.graphing._utils import parse_perf_data, translate_metrics
 from cmk.gui.type_defs import Perfdata, PerfDataTuple
 
-_GRAPH_TEMPLATES = [
+_GRAPH_TEMPLATES = (
     GraphTemplate(
         id="1",
         title="Graph 1",
@@ -59,7 +60,16 @@ _GRAPH_TEMPLATES = [
         omit_zero_metrics=False,
         metrics=[],
     ),
-]
+)
+
+
+@pytest.fixture(name="patched_graph_templates")
+def fixture_patched_graph_templates(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        gt,
+        "get_graph_templates",
+        lambda _metrics: _GRAPH_TEMPLATES,
+    )
 
 
 @pytest.mark.parametrize(
@@ -109,17 +119,12 @@ _GRAPH_TEMPLATES = [
         ),
     ],
 )
+@pytest.mark.usefixtures("patched_graph_templates")
 def test__matching_graph_templates(
-    monkeypatch: MonkeyPatch,
     graph_id: str | None,
     graph_index: int | None,
     expected_result: Sequence[tuple[int, GraphTemplate]],
 ) -> None:
-    monkeypatch.setattr(
-        gt,
-        "get_graph_templates",
-        lambda _metrics: _GRAPH_TEMPLATES,
-    )
     assert (
         list(
             _matching_graph_templates(
@@ -200,17 +205,17 @@ def test_horizontal_rules_from_thresholds(
 
 def test_duplicate_graph_templates(request_context: None) -> None:
     idents_by_metrics: dict[tuple[str, ...], list[str]] = {}
+    setdefault = idents_by_metrics.setdefault
     for id_, template in _graph_templates_from_plugins():
         parsed = _parse_graph_template(id_, template)
-        expressions = [m.expression for m in parsed.metrics] + [
-            s.expression for s in parsed.scalars
-        ]
-        if parsed.range:
-            expressions.extend((parsed.range.min, parsed.range.max))
-
-        idents_by_metrics.setdefault(
-            tuple(sorted(m.name for e in expressions for m in e.metrics())), []
-        ).append(parsed.id)
+        expressions = itertools.chain(
+            (m.expression for m in parsed.metrics),
+            (s.expression for s in parsed.scalars),
+            (parsed.range.min, parsed.range.max) if parsed.range else (),
+        )
+        setdefault(tuple(sorted(m.name for e in expressions for m in e.metrics())), []).append(
+            parsed.id
+        )
 
     assert {tuple(idents) for idents in idents_by_metrics.values() if len(idents) >= 2} == {
         ("livestatus_requests_per_connection", "livestatus_connects_and_requests"),
@@ -229,23 +234,15 @@ def test_graph_template_with_layered_areas(request_context: None) -> None:
     areas_by_ident: dict[str, _GraphTemplateArea] = {}
     for id_, template in _graph_templates_from_plugins():
         parsed = _parse_graph_template(id_, template)
+        areas = _GraphTemplateArea()
         for metric in parsed.metrics:
-            if metric.line_type == "area":
-                areas_by_ident.setdefault(parsed.id, _GraphTemplateArea()).pos.append(
-                    metric.line_type
-                )
-            elif metric.line_type == "stack":
-                areas_by_ident.setdefault(parsed.id, _GraphTemplateArea()).pos.append(
-                    metric.line_type
-                )
-            elif metric.line_type == "-area":
-                areas_by_ident.setdefault(parsed.id, _GraphTemplateArea()).neg.append(
-                    metric.line_type
-                )
-            elif metric.line_type == "-stack":
-                areas_by_ident.setdefault(parsed.id, _GraphTemplateArea()).neg.append(
-                    metric.line_type
-                )
+            match line_type := metric.line_type:
+                case "area" | "stack":
+                    areas.pos.append(line_type)
+                case "-area" | "-stack":
+                    areas.neg.append(line_type)
+        if areas.pos or areas.neg:
+            areas_by_ident[parsed.id] = areas
 
     templates_with_more_than_one_layer = [
         ident
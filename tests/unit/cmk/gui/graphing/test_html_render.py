@@ -4,10 +4,31 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from collections.abc import Sequence
+from types import SimpleNamespace
 
 import pytest
 
-from cmk.gui.graphing._html_render import _render_title_elements_plain
+from livestatus import MKLivestatusNotFoundError, SiteId
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.user import UserId
+
+from cmk.gui.graphing import _html_render
+from cmk.gui.graphing._artwork import Curve
+from cmk.gui.graphing._graph_render_config import GraphRenderConfig
+from cmk.gui.graphing._graph_specification import GraphDataRange, GraphRecipe, HorizontalRule
+from cmk.gui.graphing._graph_templates import TemplateGraphSpecification
+from cmk.gui.graphing._html_render import (
+    _graph_hover_curves,
+    _GraphHoverContext,
+    _HOVER_CURVES_CACHE_SIZE,
+    _HOVER_CURVES_CACHE_TTL,
+    _render_graphs_from_definitions,
+    _render_title_elements_plain,
+    render_graphs_from_specification_html,
+)
+
+from cmk.ccc.exceptions import MKGeneralException
 
 
 @pytest.mark.parametrize(
@@ -25,3 +46,184 @@ from cmk.gui.graphing._html_render import _render_title_elements_plain
 )
 def test_render_title_elements_plain(elements: Sequence[str], result: str) -> None:
     assert _render_title_elements_plain(elements) == result
+
+
+def _graph_specification(graph_id: str) -> TemplateGraphSpecification:
+    return TemplateGraphSpecification(
+        site=SiteId("NO_SITE"),
+        host_name=HostName("my-host"),
+        service_description="My Service",
+        graph_index=0,
+        graph_id=graph_id,
+    )
+
+
+def _graph_recipe(title: str) -> GraphRecipe:
+    return GraphRecipe(
+        title=title,
+        metrics=[],
+        unit="",
+        explicit_vertical_range=None,
+        horizontal_rules=[],
+        omit_zero_metrics=False,
+        consolidation_function="max",
+        specification=_graph_specification(title),
+    )
+
+
+@pytest.mark.parametrize(
+    "exception, message",
+    [
+        pytest.param(
+            MKLivestatusNotFoundError("not found"),
+            "Cannot fetch data via Livestatus",
+            id="livestatus",
+        ),
+        pytest.param(MKGeneralException("Broken template"), "Broken template", id="general"),
+    ],
+)
+@pytest.mark.usefixtures("request_context")
+def test_render_graphs_from_specification_recipe_error(
+    monkeypatch: pytest.MonkeyPatch, exception: Exception, message: str
+) -> None:
+    def _recipes(self: TemplateGraphSpecification) -> list[GraphRecipe]:
+        if self.graph_id == "broken":
+            raise exception
+        return [_graph_recipe("working")]
+
+    monkeypatch.setattr(TemplateGraphSpecification, "recipes", _recipes)
+
+    broken, working = [
+        str(
+            render_graphs_from_specification_html(
+                _graph_specification(graph_id),
+                GraphDataRange(time_range=(1681985455, 1681999855), step=20),
+                GraphRenderConfig(foreground_color="#000000"),
+            )
+        )
+        for graph_id in ("broken", "working")
+    ]
+
+    assert "brokengraph" in broken
+    assert "Cannot calculate graph recipes" in broken
+    assert message in broken
+    assert "brokengraph" not in working
+    assert "cmk.graphs.load_graph_content(" in working
+
+
+@pytest.mark.parametrize(
+    "render_async", [pytest.param(True, id="async"), pytest.param(False, id="sync")]
+)
+@pytest.mark.usefixtures("request_context")
+def test_render_graphs_from_definitions_json(render_async: bool) -> None:
+    graph_recipe = _graph_recipe("Wärme").model_copy(
+        update={
+            "horizontal_rules": [
+                HorizontalRule(value=float("inf"), rendered_value="∞", color="#ff0000", title="Max")
+            ]
+        }
+    )
+
+    rendered = str(
+        _render_graphs_from_definitions(
+            [graph_recipe],
+            GraphDataRange(time_range=(1681985455, 1681999855), step=20),
+            GraphRenderConfig(
+                foreground_color="#000000", show_controls=False, show_time_range_previews=False
+            ),
+            render_async=render_async,
+        )
+    )
+
+    # Both paths serialize like json.dumps(), which the javascript code can parse
+    assert '"value": Infinity' in rendered
+    assert '"title": "W\\u00e4rme"' in rendered
+
+
+class _HoverCurvesEnv:
+    def __init__(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.now = 1681999855.0
+        self.computed: list[str] = []
+        self._monkeypatch = monkeypatch
+        monkeypatch.setattr(_html_render, "_hover_curves_cache", {})
+        monkeypatch.setattr("cmk.gui.graphing._html_render.time.time", lambda: self.now)
+        monkeypatch.setattr(
+            _html_render, "compute_graph_artwork_curves", self._compute_graph_artwork_curves
+        )
+        self.login(UserId("harry"))
+
+    def _compute_graph_artwork_curves(
+        self, graph_recipe: GraphRecipe, graph_data_range: GraphDataRange
+    ) -> list[Curve]:
+        self.computed.append(graph_recipe.title)
+        return []
+
+    def login(self, user_id: UserId) -> None:
+        self._monkeypatch.setattr(_html_render, "user", SimpleNamespace(id=user_id))
+
+    def hover(self, title: str) -> None:
+        _graph_hover_curves(
+            _GraphHoverContext(
+                definition=_graph_recipe(title),
+                data_range=GraphDataRange(time_range=(1681985455, 1681999855), step=20),
+            )
+        )
+
+
+@pytest.fixture(name="hover_curves_env")
+def fixture_hover_curves_env(monkeypatch: pytest.MonkeyPatch) -> _HoverCurvesEnv:
+    return _HoverCurvesEnv(monkeypatch)
+
+
+def test_graph_hover_curves_cached_until_expired(hover_curves_env: _HoverCurvesEnv) -> None:
+    hover_curves_env.hover("graph")
+    hover_curves_env.now += _HOVER_CURVES_CACHE_TTL - 1
+    hover_curves_env.hover("graph")
+    assert hover_curves_env.computed == ["graph"]
+
+    hover_curves_env.now += 1
+    hover_curves_env.hover("graph")
+    assert hover_curves_env.computed == ["graph", "graph"]
+
+
+def test_graph_hover_curves_cached_per_user(hover_curves_env: _HoverCurvesEnv) -> None:
+    hover_curves_env.hover("graph")
+    hover_curves_env.login(UserId("sally"))
+    hover_curves_env.hover("graph")
+    hover_curves_env.login(UserId("harry"))
+    hover_curves_env.hover("graph")
+    assert hover_curves_env.computed == ["graph", "graph"]
+
+
+def test_graph_hover_curves_evict_oldest(hover_curves_env: _HoverCurvesEnv) -> None:
+    titles = [f"graph {n}" for n in range(_HOVER_CURVES_CACHE_SIZE + 1)]
+    for title in titles:
+        hover_curves_env.hover(title)
+    hover_curves_env.computed.clear()
+
+    for title in titles[1:]:
+        hover_curves_env.hover(title)
+    assert not hover_curves_env.computed
+
+    hover_curves_env.hover(titles[0])
+    assert hover_curves_env.computed == [titles[0]]
+
+
+def test_graph_hover_curves_refresh_moves_to_newest(hover_curves_env: _HoverCurvesEnv) -> None:
+    hover_curves_env.hover("refreshed")
+    hover_curves_env.now += 10
+    titles = [f"graph {n}" for n in range(_HOVER_CURVES_CACHE_SIZE - 2)]
+    for title in titles:
+        hover_curves_env.hover(title)
+
+    # Only the first entry has expired, refreshing it must not leave it as the oldest one
+    hover_curves_env.now += _HOVER_CURVES_CACHE_TTL - 5
+    hover_curves_env.hover("refreshed")
+    hover_curves_env.hover("new")
+    hover_curves_env.hover("newer")
+    hover_curves_env.computed.clear()
+
+    hover_curves_env.hover("refreshed")
+    hover_curves_env.hover(titles[1])
+    hover_curves_env.hover(titles[0])
+    assert hover_curves_env.computed == [titles[0]]
@@ -401,6 +401,11 @@ def test_parse_ipmi_sensors(
     assert ipmi_sensors.parse_ipmi_sensors(string_table) == expected_result
 
 
+def test_parse_ipmi_sensors_malformed_reading() -> None:
+    with pytest.raises(ValueError):
+        ipmi_sensors.parse_ipmi_sensors([["4", "CPU Temp", "garbage", "[OK]"]])
+
+
 @pytest.mark.parametrize(
     [
         "section",